@@ -3,14 +3,23 @@ Command-line interface for nutshell
 """
 
 import argparse
+import hashlib
+import os
 import sys
+from collections import Counter
+from contextlib import contextmanager, redirect_stdout
 from pathlib import Path
+from types import SimpleNamespace
 from nutshell_pkg.core import (
-    summarize_paper, save_summary, transcribe_paper, save_transcription, calculate_cost,
-    resolve_model_name, download_pdf_from_url, extract_arxiv_id
+    summarize_paper, save_summary, transcribe_paper, calculate_cost, TRANSCRIPTION_DISCLAIMER,
+    resolve_model_name, download_pdf_from_url, extract_arxiv_id, is_url,
+    summarize_many, summarize_papers, summarize_papers_batch, DEFAULT_CONCURRENCY
 )
 
 
+# Parallel downloads when resolving summarize-batch inputs
+DOWNLOAD_WORKERS = 8
+
 def check_opus_warning(model_name):
     """
     Check if model is opus and show warning.
@@ -30,23 +39,125 @@ def check_opus_warning(model_name):
     return True
 
 
+def print_usage(model, usage, batch=False):
+    """
+    Print token usage and cost for an API call.
+
+    Args:
+        model: Resolved model ID
+        usage: Usage object returned by the API (or the response cache)
+        batch: Whether the tokens were billed at Message Batches API rates
+    """
+    if getattr(usage, 'cached', False):
+        print("\nCached response (no API cost)")
+        return
+
+    cache_write = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+    cache_read = getattr(usage, 'cache_read_input_tokens', 0) or 0
+
+    print(f"\nTokens: {usage.input_tokens:,} in, {usage.output_tokens:,} out")
+    if cache_write or cache_read:
+        print(f"Prompt cache: {cache_write:,} written, {cache_read:,} read")
+
+    cost = calculate_cost(model, usage.input_tokens, usage.output_tokens, cache_write, cache_read, batch=batch)
+    if cost is not None:
+        print(f"Cost: ${cost:.4f}")
+
+
+@contextmanager
+def streamed_output(output_path, header='', fsync=False):
+    """
+    Write streamed response text to output_path as it arrives.
+
+    Text goes to a temporary .part file that is moved into place only once
+    the block completes, so a failed request never leaves a partial output.
+
+    Args:
+        output_path: Final output path
+        header: Text written before the response
+        fsync: Flush the file to disk before moving it into place
+
+    Yields:
+        Callback that appends a text chunk and updates the progress line
+    """
+    tmp_path = output_path.with_name(output_path.name + '.part')
+    received = 0
+
+    def on_text(text):
+        nonlocal received
+        f.write(text)
+        received += len(text)
+        sys.stdout.write(f"\rReceiving: {received:,} characters")
+        sys.stdout.flush()
+
+    try:
+        # Newlines untranslated, as save_summary() writes them, so output
+        # is identical whichever command produced it
+        with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(header)
+            yield on_text
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, output_path)
+    finally:
+        if received:
+            print()
+        tmp_path.unlink(missing_ok=True)
+
+
+@contextmanager
+def stdout_output(stream, header=''):
+    """
+    Write streamed response text straight to stream, for `-o -`.
+
+    Args:
+        stream: Original stdout (status messages go to stderr meanwhile)
+        header: Text written before the response
+
+    Yields:
+        Callback that writes a text chunk
+    """
+    def on_text(text):
+        stream.write(text)
+        stream.flush()
+
+    stream.write(header)
+    yield on_text
+
+
+def open_output(output_path, args, header=''):
+    """Stream to output_path, or to stdout if output_path is None."""
+    if output_path is None:
+        return stdout_output(args.stdout, header=header)
+    return streamed_output(output_path, header=header, fsync=args.fsync)
+
+
 def resolve_pdf_path(pdf_input):
     """
-    Resolve PDF input (URL or file path) to a local file path.
+    Resolve PDF input (URL or file path) to something the API can read.
+
+    arXiv PDF URLs are returned unchanged for the API to fetch; other URLs
+    are downloaded to the local cache.
 
     Args:
         pdf_input: URL or file path string
 
     Returns:
-        Tuple of (Path object, suggested output name)
+        Tuple of (Path object or URL string, suggested output name)
     """
     # Check if it's a URL
-    if pdf_input.startswith('http://') or pdf_input.startswith('https://'):
+    if is_url(pdf_input):
+        arxiv_id = extract_arxiv_id(pdf_input)
+
+        # arXiv PDF URLs are fetched by the API directly, no local download
+        if arxiv_id and '/pdf/' in pdf_input:
+            return pdf_input, arxiv_id
+
         # Download and cache PDF
         cached_path = download_pdf_from_url(pdf_input)
 
-        # Try to extract arXiv ID for output naming
-        arxiv_id = extract_arxiv_id(pdf_input)
+        # Use arXiv ID for output naming if present
         suggested_name = arxiv_id if arxiv_id else Path(cached_path).stem
 
         return cached_path, suggested_name
@@ -56,6 +167,28 @@ def resolve_pdf_path(pdf_input):
         return pdf_path, pdf_path.stem
 
 
+def _resolve_all(pdf_inputs):
+    """
+    Resolve many PDF inputs, downloading URLs in parallel.
+
+    Returns:
+        Dict mapping each distinct input to its resolve_pdf_path() result,
+        or to the exception it raised
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    def resolve(pdf_input):
+        try:
+            return resolve_pdf_path(pdf_input)
+        except Exception as e:
+            return e
+
+    # Duplicates resolve once; they would otherwise race on the same cache file
+    unique = list(dict.fromkeys(pdf_inputs))
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+        return dict(zip(unique, pool.map(resolve, unique)))
+
+
 def cmd_summarize(args):
     """Handle the summarize subcommand."""
     # Resolve model shortname
@@ -74,31 +207,39 @@ def cmd_summarize(args):
         sys.exit(1)
 
     # Validate file exists (for local paths)
-    if not pdf_path.exists():
+    if not is_url(pdf_path) and not pdf_path.exists():
         print(f"Error: PDF file not found: {pdf_path}")
         sys.exit(1)
 
-    # Determine output path
-    if args.output:
+    # Determine output path (None means stdout)
+    if args.output == '-':
+        output_path = None
+    elif args.output:
         output_path = Path(args.output)
     else:
         # Use current directory with suggested name
         output_path = Path.cwd() / f"{suggested_name}_summary.md"
 
+    # Don't spend an API call regenerating output that already exists
+    if output_path and output_path.exists() and not (args.force or args.refresh):
+        print(f"✓ {output_path} exists, skipping (use --force to regenerate)")
+        return
+
     print(f"Processing: {pdf_path}")
     print(f"Using model: {model}")
     print(f"Using prompt: {args.prompt}")
 
     try:
-        summary, usage = summarize_paper(pdf_path, model=model, prompt_file=args.prompt)
-        save_summary(summary, output_path)
-        print(f"✓ Summary saved to: {output_path}")
+        with open_output(output_path, args) as on_text:
+            summary, usage = summarize_paper(
+                pdf_path, model=model, prompt_file=args.prompt,
+                use_cache=not args.no_cache, refresh=args.refresh, on_text=on_text
+            )
+        if output_path:
+            print(f"✓ Summary saved to: {output_path}")
 
         # Print usage stats
-        print(f"\nTokens: {usage.input_tokens:,} in, {usage.output_tokens:,} out")
-        cost = calculate_cost(model, usage.input_tokens, usage.output_tokens)
-        if cost is not None:
-            print(f"Cost: ${cost:.4f}")
+        print_usage(model, usage)
     except Exception as e:
         print(f"\033[31m✗ Summarization failed:\033[0m {e}")
         sys.exit(1)
@@ -122,131 +263,380 @@ def cmd_transcribe(args):
         sys.exit(1)
 
     # Validate file exists (for local paths)
-    if not pdf_path.exists():
+    if not is_url(pdf_path) and not pdf_path.exists():
         print(f"Error: PDF file not found: {pdf_path}")
         sys.exit(1)
 
-    # Determine output path
-    if args.output:
+    # Determine output path (None means stdout)
+    if args.output == '-':
+        output_path = None
+    elif args.output:
         output_path = Path(args.output)
     else:
         # Use current directory with suggested name
         output_path = Path.cwd() / f"{suggested_name}_transcription.md"
 
+    # Don't spend an API call regenerating output that already exists
+    if output_path and output_path.exists() and not (args.force or args.refresh):
+        print(f"✓ {output_path} exists, skipping (use --force to regenerate)")
+        return
+
     print(f"Processing: {pdf_path}")
     print(f"Using model: {model}")
     print(f"Using prompt: {args.prompt}")
 
     try:
-        transcription, usage = transcribe_paper(pdf_path, model=model, prompt_file=args.prompt)
-        save_transcription(transcription, output_path)
-        print(f"✓ Transcription saved to: {output_path}")
+        with open_output(output_path, args, header=TRANSCRIPTION_DISCLAIMER) as on_text:
+            transcription, usage = transcribe_paper(
+                pdf_path, model=model, prompt_file=args.prompt,
+                use_cache=not args.no_cache, refresh=args.refresh, on_text=on_text
+            )
+        if output_path:
+            print(f"✓ Transcription saved to: {output_path}")
 
         # Print usage stats
-        print(f"\nTokens: {usage.input_tokens:,} in, {usage.output_tokens:,} out")
-        cost = calculate_cost(model, usage.input_tokens, usage.output_tokens)
-        if cost is not None:
-            print(f"Cost: ${cost:.4f}")
+        print_usage(model, usage)
     except Exception as e:
         print(f"\033[31m✗ Transcription failed:\033[0m {e}")
         sys.exit(1)
 
 
-def main():
-    """Main CLI entry point with subcommands."""
-    parser = argparse.ArgumentParser(
-        prog='nutshell',
-        description='Research paper assistant tools using Claude API'
-    )
+def _run_concurrent(jobs, model, args):
+    """
+    Summarize PDFs concurrently, one request per paper.
 
-    subparsers = parser.add_subparsers(dest='command', help='Available commands')
+    Args:
+        jobs: List of (pdf_path, output_path) tuples
+        model: Resolved model ID
+        args: Parsed batch arguments
 
-    # Summarize subcommand
-    summarize_parser = subparsers.add_parser(
-        'summarize',
-        help='Summarize a research paper'
-    )
-    summarize_parser.add_argument(
-        'pdf_path',
-        type=str,
-        help='Path or URL to PDF file to summarize'
-    )
-    summarize_parser.add_argument(
-        '-o', '--output',
-        type=str,
-        help='Output path for summary (default: <pdf_name>_summary.md)'
+    Returns:
+        Tuple of (number of papers summarized, list of usage objects)
+    """
+    import asyncio
+
+    usages = []
+
+    # Save each summary as soon as its paper finishes
+    def on_result(index, result):
+        pdf_path, output_path = jobs[index]
+        if isinstance(result, Exception):
+            print(f"\033[31m✗ Summarization failed for {pdf_path}:\033[0m {result}")
+            return
+        summary, usage = result
+        save_summary(summary, output_path, fsync=args.fsync)
+        print(f"✓ Summary saved to: {output_path}")
+        usages.append(usage)
+
+    asyncio.run(summarize_many(
+        [pdf_path for pdf_path, _ in jobs], model=model, prompt_file=args.prompt,
+        concurrency=args.concurrency, use_cache=not args.no_cache, refresh=args.refresh,
+        on_result=on_result, requests_per_minute=args.requests_per_minute,
+        input_tokens_per_minute=args.tokens_per_minute
+    ))
+    return len(usages), usages
+
+
+def _run_combined(jobs, model, args):
+    """
+    Summarize all PDFs in a single API request.
+
+    Returns:
+        Tuple of (number of papers summarized, list of usage objects)
+    """
+    try:
+        summaries, usage = summarize_papers(
+            [pdf_path for pdf_path, _ in jobs], model=model, prompt_file=args.prompt
+        )
+    except Exception as e:
+        print(f"\033[31m✗ Summarization failed:\033[0m {e}")
+        return 0, []
+
+    succeeded = 0
+    for (pdf_path, output_path), summary in zip(jobs, summaries):
+        if summary is None:
+            print(f"\033[31m✗ No summary returned for {pdf_path}\033[0m")
+            continue
+        save_summary(summary, output_path, fsync=args.fsync)
+        print(f"✓ Summary saved to: {output_path}")
+        succeeded += 1
+
+    return succeeded, [usage]
+
+
+def _run_batch_api(jobs, model, args):
+    """
+    Summarize PDFs through the Message Batches API, waiting for the results.
+
+    Returns:
+        Tuple of (number of papers summarized, list of usage objects)
+    """
+    try:
+        results = summarize_papers_batch(
+            [pdf_path for pdf_path, _ in jobs], model=model, prompt_file=args.prompt,
+            use_cache=not args.no_cache, refresh=args.refresh
+        )
+    except Exception as e:
+        print(f"\033[31m✗ Batch submission failed:\033[0m {e}")
+        return 0, []
+
+    usages = []
+    for (pdf_path, output_path), result in zip(jobs, results):
+        # Failed requests were already reported
+        if result is None:
+            continue
+        summary, usage = result
+        save_summary(summary, output_path, fsync=args.fsync)
+        print(f"✓ Summary saved to: {output_path}")
+        usages.append(usage)
+
+    return len(usages), usages
+
+
+def cmd_batch(args):
+    """Handle the summarize-batch subcommand."""
+    # Resolve model shortname
+    model = resolve_model_name(args.model)
+
+    # Check for opus warning
+    if not check_opus_warning(model):
+        print("Aborted.")
+        sys.exit(0)
+
+    output_dir = Path(args.output_dir) if args.output_dir else Path.cwd()
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    # Resolve all inputs up front; bad inputs are reported and skipped
+    resolved = _resolve_all(args.pdf_paths)
+    papers = []
+    failed = 0
+    skipped = 0
+    seen_papers = set()
+    for pdf_input in args.pdf_paths:
+        result = resolved[pdf_input]
+        if isinstance(result, Exception):
+            print(f"\033[31m✗ Error:\033[0m {result}")
+            failed += 1
+            continue
+        pdf_path, suggested_name = result
+
+        if not is_url(pdf_path) and not pdf_path.exists():
+            print(f"Error: PDF file not found: {pdf_path}")
+            failed += 1
+            continue
+
+        # The same paper given twice (e.g. via different relative paths)
+        paper_id = pdf_path if is_url(pdf_path) else pdf_path.resolve()
+        if paper_id in seen_papers:
+            print(f"✓ {pdf_input} was already given, skipping")
+            skipped += 1
+            continue
+        seen_papers.add(paper_id)
+        papers.append((pdf_path, suggested_name, paper_id))
+
+    # Different papers with the same name (e.g. two paper.pdf) each get a
+    # suffix derived from the paper's location, so names don't depend on order
+    name_counts = Counter(suggested_name for _, suggested_name, _ in papers)
+    jobs = []
+    for pdf_path, suggested_name, paper_id in papers:
+        name = suggested_name
+        if name_counts[name] > 1:
+            suffix = hashlib.blake2b(str(paper_id).encode('utf-8'), digest_size=3).hexdigest()
+            name = f"{suggested_name}_{suffix}"
+
+        output_path = output_dir / f"{name}_summary.md"
+        if output_path.exists() and not (args.force or args.refresh):
+            print(f"✓ {output_path} exists, skipping (use --force to regenerate)")
+            skipped += 1
+            continue
+
+        jobs.append((pdf_path, output_path))
+
+    if args.combine:
+        print(f"Processing {len(jobs)} papers in one request")
+    elif args.batch_api:
+        print(f"Processing {len(jobs)} papers via the Message Batches API")
+    else:
+        print(f"Processing {len(jobs)} papers ({args.concurrency} at a time)")
+    print(f"Using model: {model}")
+    print(f"Using prompt: {args.prompt}")
+
+    if not jobs:
+        succeeded, usages = 0, []
+    elif args.combine:
+        succeeded, usages = _run_combined(jobs, model, args)
+    elif args.batch_api:
+        succeeded, usages = _run_batch_api(jobs, model, args)
+    else:
+        succeeded, usages = _run_concurrent(jobs, model, args)
+    failed += len(jobs) - succeeded
+
+    # Print combined usage stats; cached responses cost nothing this run
+    cached = sum(1 for u in usages if getattr(u, 'cached', False))
+    usages = [u for u in usages if not getattr(u, 'cached', False)]
+    total = SimpleNamespace(
+        input_tokens=sum(u.input_tokens for u in usages),
+        output_tokens=sum(u.output_tokens for u in usages),
+        cache_creation_input_tokens=sum(getattr(u, 'cache_creation_input_tokens', 0) or 0 for u in usages),
+        cache_read_input_tokens=sum(getattr(u, 'cache_read_input_tokens', 0) or 0 for u in usages),
     )
-    summarize_parser.add_argument(
+    print(f"\n{succeeded} summarized ({cached} from cache), {skipped} skipped, {failed} failed")
+    print_usage(model, total, batch=args.batch_api)
+
+    if failed:
+        sys.exit(1)
+
+
+def positive_int(value):
+    """argparse type for options that must be a whole number of at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def add_shared_args(subparser, model_default, prompt_default):
+    """
+    Add model, prompt, cache and overwrite options shared by all subcommands.
+
+    Args:
+        subparser: Subcommand parser to add arguments to
+        model_default: Default model shortname
+        prompt_default: Default prompt file
+    """
+    other_models = ', '.join(m for m in ('sonnet', 'haiku', 'opus') if m != model_default)
+    subparser.add_argument(
         '-m', '--model',
         type=str,
-        default='sonnet',
-        help='Model to use: sonnet (default), haiku, opus, or full model ID'
+        default=model_default,
+        help=f'Model to use: {model_default} (default), {other_models}, or full model ID'
     )
-    summarize_parser.add_argument(
+    subparser.add_argument(
         '-p', '--prompt',
         type=str,
-        default='v2_no_scratchpad.txt',
-        help='Prompt file to use from Prompts/ (default: v2_no_scratchpad.txt)'
+        default=prompt_default,
+        help=f'Prompt file to use from Prompts/ (default: {prompt_default})'
     )
-    summarize_parser.set_defaults(func=cmd_summarize)
-
-    # Summarise subcommand (British spelling alias)
-    summarise_parser = subparsers.add_parser(
-        'summarise',
-        help='Summarize a research paper (British spelling)'
+    subparser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Do not read or write the local response cache'
+    )
+    subparser.add_argument(
+        '--refresh',
+        action='store_true',
+        help='Ignore any cached response and call the API again'
+    )
+    subparser.add_argument(
+        '--force',
+        action='store_true',
+        help='Regenerate output even if the output file already exists'
     )
-    summarise_parser.add_argument(
+    subparser.add_argument(
+        '--fsync',
+        action='store_true',
+        help='Flush output files to disk before reporting them saved'
+    )
+
+
+def add_common_args(subparser, action, output_kind, model_default, prompt_default):
+    """
+    Add arguments shared by the single-paper subcommands.
+
+    Args:
+        subparser: Subcommand parser to add arguments to
+        action: Verb used in help text (e.g. 'summarize')
+        output_kind: Output type, used in help text and default file suffix
+        model_default: Default model shortname
+        prompt_default: Default prompt file
+    """
+    subparser.add_argument(
         'pdf_path',
         type=str,
-        help='Path or URL to PDF file to summarize'
+        help=f'Path or URL to PDF file to {action}'
     )
-    summarise_parser.add_argument(
+    subparser.add_argument(
         '-o', '--output',
         type=str,
-        help='Output path for summary (default: <pdf_name>_summary.md)'
+        help=f'Output path for {output_kind}, or - for stdout (default: <pdf_name>_{output_kind}.md)'
     )
-    summarise_parser.add_argument(
-        '-m', '--model',
-        type=str,
-        default='sonnet',
-        help='Model to use: sonnet (default), haiku, opus, or full model ID'
+    add_shared_args(subparser, model_default, prompt_default)
+
+
+def main():
+    """Main CLI entry point with subcommands."""
+    parser = argparse.ArgumentParser(
+        prog='nutshell',
+        description='Research paper assistant tools using Claude API'
     )
-    summarise_parser.add_argument(
-        '-p', '--prompt',
-        type=str,
-        default='v2_no_scratchpad.txt',
-        help='Prompt file to use from Prompts/ (default: v2_no_scratchpad.txt)'
+
+    subparsers = parser.add_subparsers(dest='command', help='Available commands')
+
+    # Summarize subcommand ('summarise' is the British spelling alias)
+    summarize_parser = subparsers.add_parser(
+        'summarize',
+        aliases=['summarise'],
+        help='Summarize a research paper'
     )
-    summarise_parser.set_defaults(func=cmd_summarize)
+    add_common_args(summarize_parser, 'summarize', 'summary', 'sonnet', 'v2_no_scratchpad.txt')
+    summarize_parser.set_defaults(func=cmd_summarize)
 
     # Transcribe subcommand
     transcribe_parser = subparsers.add_parser(
         'transcribe',
         help='Create a full transcription of a research paper'
     )
-    transcribe_parser.add_argument(
-        'pdf_path',
-        type=str,
-        help='Path or URL to PDF file to transcribe'
+    add_common_args(transcribe_parser, 'transcribe', 'transcription', 'haiku', 'transcribe_v1.txt')
+    transcribe_parser.set_defaults(func=cmd_transcribe)
+
+    # Batch summarize subcommand
+    batch_parser = subparsers.add_parser(
+        'summarize-batch',
+        help='Summarize several research papers concurrently'
     )
-    transcribe_parser.add_argument(
-        '-o', '--output',
+    batch_parser.add_argument(
+        'pdf_paths',
         type=str,
-        help='Output path for transcription (default: <pdf_name>_transcription.md)'
+        nargs='+',
+        help='Paths or URLs to PDF files to summarize'
     )
-    transcribe_parser.add_argument(
-        '-m', '--model',
+    batch_parser.add_argument(
+        '-o', '--output-dir',
         type=str,
-        default='haiku',
-        help='Model to use: haiku (default), sonnet, opus, or full model ID'
+        help='Directory for summaries (default: current directory)'
     )
-    transcribe_parser.add_argument(
-        '-p', '--prompt',
-        type=str,
-        default='transcribe_v1.txt',
-        help='Prompt file to use from Prompts/ (default: transcribe_v1.txt)'
+    batch_parser.add_argument(
+        '-c', '--concurrency',
+        type=positive_int,
+        default=DEFAULT_CONCURRENCY,
+        help=f'Maximum number of papers processed at once (default: {DEFAULT_CONCURRENCY})'
     )
-    transcribe_parser.set_defaults(func=cmd_transcribe)
+    batch_parser.add_argument(
+        '--requests-per-minute',
+        type=positive_int,
+        help='Pace requests to stay under this rate limit (default: no limit)'
+    )
+    batch_parser.add_argument(
+        '--tokens-per-minute',
+        type=positive_int,
+        help='Pace requests to stay under this input token rate limit (default: no limit)'
+    )
+    batch_mode = batch_parser.add_mutually_exclusive_group()
+    batch_mode.add_argument(
+        '--combine',
+        action='store_true',
+        help='Send all papers in a single request (best for a few short papers)'
+    )
+    batch_mode.add_argument(
+        '--batch-api',
+        action='store_true',
+        help='Submit via the Message Batches API: half price, but may take hours'
+    )
+    add_shared_args(batch_parser, 'sonnet', 'v2_no_scratchpad.txt')
+    batch_parser.set_defaults(func=cmd_batch)
 
     args = parser.parse_args()
 
@@ -255,8 +645,14 @@ def main():
         parser.print_help()
         sys.exit(1)
 
-    # Execute the command
-    args.func(args)
+    # Execute the command; with -o - the output itself goes to stdout, so
+    # status messages are moved to stderr
+    if getattr(args, 'output', None) == '-':
+        args.stdout = sys.stdout
+        with redirect_stdout(sys.stderr):
+            args.func(args)
+    else:
+        args.func(args)
 
 
 if __name__ == '__main__':
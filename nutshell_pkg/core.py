@@ -2,18 +2,55 @@
 Core functionality for paper summarization
 """
 
-import base64
+import binascii
 import hashlib
+import json
+import mmap
 import os
 import re
-import urllib.request
+import threading
+import time
+from functools import lru_cache
 from pathlib import Path
-from anthropic import Anthropic
+from types import SimpleNamespace
 
+try:
+    # SIMD-accelerated base64 (optional: pip install nutshell[fast])
+    from pybase64 import b64encode_as_string as _b64encode_str
+except ImportError:
+    def _b64encode_str(data):
+        # What base64.b64encode() calls internally, minus the wrapper
+        return binascii.b2a_base64(data, newline=False).decode('ascii')
 
+
+# Prompts directory relative to package installation
+PROMPTS_DIR = Path(__file__).parent.parent / "Prompts"
+
+# Local cache locations
+CACHE_DIR = Path.home() / '.cache' / 'nutshell'
+RESPONSE_CACHE_DIR = CACHE_DIR / 'responses'
+FILES_CACHE_PATH = CACHE_DIR / 'files.json'
+URLS_CACHE_PATH = CACHE_DIR / 'urls.json'
+BATCHES_DIR = CACHE_DIR / 'batches'
+
+# Beta flag required to reference uploaded files in messages
+FILES_API_BETA = "files-api-2025-04-14"
+
+# PDFs up to this size are sent inline as base64; larger ones via the Files API
+INLINE_SIZE_LIMIT = 512 * 1024
+
+# Retries for 429/5xx/overloaded errors; the SDK backs off exponentially with
+# jitter and honours Retry-After
+MAX_RETRIES = 5
+
+# Connect/read timeout for PDF downloads, in seconds
+DOWNLOAD_TIMEOUT = 30
+
+
+@lru_cache(maxsize=1)
 def load_api_key():
     """
-    Load Anthropic API key from environment or config file.
+    Load Anthropic API key from environment or config file (once per process).
 
     Checks in order:
     1. ANTHROPIC_API_KEY environment variable
@@ -29,16 +66,43 @@ def load_api_key():
 
     # Check config file
     config_path = Path.home() / '.config' / 'nutshell' / 'config'
-    if config_path.exists():
+    try:
         with open(config_path, 'r') as f:
             for line in f:
                 line = line.strip()
                 if line.startswith('ANTHROPIC_API_KEY='):
                     return line.split('=', 1)[1]
+    except FileNotFoundError:
+        pass
 
     return None
 
 
+# Output token limits; transcriptions reproduce the whole paper
+SUMMARY_MAX_TOKENS = 4096
+TRANSCRIPTION_MAX_TOKENS = 16384
+
+# Papers processed at once by summarize_many()
+DEFAULT_CONCURRENCY = 4
+
+# Output limit when several papers are summarized in one response
+COMBINED_MAX_TOKENS = 32000
+
+# Appended to the prompt when several papers are summarized in one request
+COMBINED_INSTRUCTIONS = """
+
+The {count} documents above are separate papers, numbered in order. Follow the instructions above for each paper separately, and wrap each paper's output in <paper id="N"></paper> tags, where N is the paper's number."""
+
+# Splits a combined response into per-paper summaries
+_PAPER_TAG_RE = re.compile(r'<paper id="(\d+)">\s*(.*?)\s*</paper>', re.DOTALL)
+
+# Seconds between status checks while waiting for a Message Batch
+BATCH_POLL_INTERVAL = 30
+
+# Comment placed at the top of every transcription
+TRANSCRIPTION_DISCLAIMER = "<!-- This is an AI-generated transcript of a PDF. Certain elements of the original document, such as figures and images, have been replaced with descriptions. -->\n\n"
+
+
 # Model shortname mappings
 MODEL_SHORTCUTS = {
     # Canonical versions (stable, curated)
@@ -72,57 +136,181 @@ def resolve_model_name(model_name):
     return MODEL_SHORTCUTS.get(model_name, model_name)
 
 
+# Maximum output tokens per model; requests asking for more are rejected
+_MODEL_MAX_OUTPUT_TOKENS = {
+    'claude-3-opus-20240229': 4096,
+    'claude-3-5-haiku-20241022': 8192,
+    'claude-haiku-4-5-20251001': 64000,
+    'claude-sonnet-4-5-20250929': 64000,
+}
+
+
+def _max_tokens_for(model, max_tokens):
+    """Clamp max_tokens to the model's output limit, if known."""
+    return min(max_tokens, _MODEL_MAX_OUTPUT_TOKENS.get(model, max_tokens))
+
+
+def is_url(pdf_input):
+    """Return True if the PDF input is an http(s) URL rather than a local path."""
+    return str(pdf_input).startswith(('http://', 'https://'))
+
+
+def _hash_file(path):
+    """
+    Content hash of a file (16-byte BLAKE2b).
+
+    Keys the response cache and uploaded file IDs, and checks the download
+    cache is intact. The digest is remembered per path, size and mtime, so
+    a PDF is read once per process however many of those need it.
+
+    Args:
+        path: File to hash
+
+    Returns:
+        Hex digest string
+    """
+    stat = os.stat(path)
+    return _hash_file_contents(os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=256)
+def _hash_file_contents(path, size, mtime_ns):
+    """Hash a file in 1 MB chunks so memory use stays flat; size and mtime_ns key the cache."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@lru_cache(maxsize=1)
+def _http_client():
+    """Shared HTTP client, so downloads reuse keep-alive connections per host."""
+    import httpx
+    return httpx.Client(follow_redirects=True, timeout=DOWNLOAD_TIMEOUT)
+
+
+def _fetch_to_cache(url, cache_path, headers=None):
+    """
+    GET url into cache_path and record its validators in the URL index.
+
+    The Content-Type is checked as soon as the response headers arrive, so
+    a non-PDF URL is rejected without a separate HEAD request or reading
+    the body. The body is written to a temporary file first, so an
+    interrupted download never replaces a good cached copy.
+
+    Args:
+        url: URL to PDF file
+        cache_path: Destination path
+        headers: Extra request headers (conditional GET validators)
+
+    Returns:
+        True if a new copy was downloaded, False if the server answered 304
+    """
+    tmp_path = cache_path.with_name(cache_path.name + '.part')
+    try:
+        with _http_client().stream('GET', url, headers=headers) as response:
+            if response.status_code == 304:
+                return False
+            response.raise_for_status()
+
+            content_type = response.headers.get('Content-Type', '').lower()
+            # Servers often send PDFs as octet-stream; trust a .pdf URL then
+            if 'application/pdf' not in content_type and not url.lower().endswith('.pdf'):
+                raise ValueError(
+                    f"URL does not appear to point to a PDF file.\n"
+                    f"Content-Type: {content_type or 'not specified'}\n"
+                    f"Expected: application/pdf"
+                )
+
+            with open(tmp_path, 'wb') as f:
+                for chunk in response.iter_bytes(1 << 16):
+                    f.write(chunk)
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+        os.replace(tmp_path, cache_path)
+    finally:
+        # Only left behind if the download failed part way
+        tmp_path.unlink(missing_ok=True)
+
+    _update_index(URLS_CACHE_PATH, url, {
+        'path': cache_path.name,
+        'etag': etag,
+        'last_modified': last_modified,
+        'blake2b': _hash_file(cache_path),
+    })
+    return True
+
+
 def download_pdf_from_url(url):
     """
     Download PDF from URL and cache it.
 
+    Cached copies are revalidated with a conditional GET (If-None-Match /
+    If-Modified-Since), so unchanged PDFs cost one 304 round trip instead
+    of a full download. Cached files are hash-checked before use.
+
     Args:
         url: URL to PDF file
 
     Returns:
         Path to cached PDF file
     """
+    import httpx
+
     # Create cache directory
-    cache_dir = Path.home() / '.cache' / 'nutshell' / 'pdfs'
+    cache_dir = CACHE_DIR / 'pdfs'
     cache_dir.mkdir(parents=True, exist_ok=True)
 
     # Use hash of URL as filename to avoid duplicates
-    url_hash = hashlib.md5(url.encode()).hexdigest()
+    url_hash = hashlib.blake2b(url.encode(), digest_size=16).hexdigest()
     cache_path = cache_dir / f"{url_hash}.pdf"
 
-    # Check if already cached
-    if cache_path.exists():
-        print(f"Using cached PDF from: {url}")
-        return cache_path
-
-    # Validate that URL points to a PDF before downloading
-    print(f"Checking URL: {url}")
+    # Check if already cached, and that the cached file is intact
+    entry = _load_index(URLS_CACHE_PATH).get(url)
     try:
-        req = urllib.request.Request(url, method='HEAD')
-        with urllib.request.urlopen(req) as response:
-            content_type = response.headers.get('Content-Type', '').lower()
+        # Entries from before the switch to BLAKE2b have no hash and are re-downloaded
+        intact = entry is not None and _hash_file(cache_path) == entry.get('blake2b')
+    except FileNotFoundError:
+        intact = False
+    if intact:
+        headers = {}
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last_modified']:
+            headers['If-Modified-Since'] = entry['last_modified']
+
+        if not headers:
+            print(f"Using cached PDF from: {url}")
+            return cache_path
+
+        try:
+            if _fetch_to_cache(url, cache_path, headers):
+                print(f"✓ Downloaded updated PDF from: {url}")
+            else:
+                print(f"Using cached PDF from: {url}")
+        except (httpx.HTTPError, ValueError) as e:
+            print(f"Could not revalidate ({e}), using cached PDF from: {url}")
+        return cache_path
 
-            # Check if content type indicates PDF
-            if 'application/pdf' not in content_type:
-                # Also check if URL ends with .pdf as fallback
-                if not url.lower().endswith('.pdf'):
-                    raise Exception(
-                        f"URL does not appear to point to a PDF file.\n"
-                        f"Content-Type: {content_type or 'not specified'}\n"
-                        f"Expected: application/pdf"
-                    )
-    except urllib.error.URLError as e:
-        raise Exception(f"Failed to validate URL: {e}")
-
-    # Download PDF
     print(f"Downloading PDF from: {url}")
     try:
-        urllib.request.urlretrieve(url, cache_path)
-        print(f"✓ Downloaded and cached")
-        return cache_path
-    except Exception as e:
+        _fetch_to_cache(url, cache_path)
+    except ValueError as e:
+        raise Exception(str(e))
+    except httpx.HTTPError as e:
         raise Exception(f"Failed to download PDF: {e}")
 
+    print(f"✓ Downloaded and cached")
+    return cache_path
+
+
+# Match patterns like: arxiv.org/pdf/2402.02896 or arxiv.org/abs/2402.02896v1
+_ARXIV_RE = re.compile(r'arxiv\.org/(?:pdf|abs)/(\d{4}\.\d{4,5})(?:v\d+)?')
+
+# arXiv URLs pinned to a version, whose content never changes
+_ARXIV_VERSIONED_RE = re.compile(r'arxiv\.org/(?:pdf|abs)/\d{4}\.\d{4,5}v\d+')
+
 
 def extract_arxiv_id(url):
     """
@@ -134,8 +322,7 @@ def extract_arxiv_id(url):
     Returns:
         arXiv ID string or None
     """
-    # Match patterns like: arxiv.org/pdf/2402.02896 or arxiv.org/abs/2402.02896v1
-    match = re.search(r'arxiv\.org/(?:pdf|abs)/(\d+\.\d+)', url)
+    match = _ARXIV_RE.search(url)
     if match:
         return match.group(1)
     return None
@@ -147,145 +334,973 @@ def load_pdf(pdf_path):
         return f.read()
 
 
+def pdf_to_b64(pdf_path):
+    """
+    Base64-encode PDF file for sending inline.
+
+    Encodes straight from a read-only memory map of the file, so the PDF is
+    never copied into a separate bytes object first. Uses pybase64 when
+    installed.
+    """
+    with open(pdf_path, 'rb') as f:
+        # mmap refuses zero-length files
+        if os.fstat(f.fileno()).st_size == 0:
+            return ''
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _b64encode_str(mm)
+
+
+@lru_cache(maxsize=16)
 def load_prompt(prompt_file):
-    """Load prompt from file."""
-    # Look for Prompts directory relative to package installation
-    pkg_dir = Path(__file__).parent.parent
-    prompt_path = pkg_dir / "Prompts" / prompt_file
+    """Load prompt from file (read once per process)."""
+    prompt_path = PROMPTS_DIR / prompt_file
 
-    if not prompt_path.exists():
-        raise FileNotFoundError(f"Prompt file not found: {prompt_path}")
+    try:
+        with open(prompt_path, 'r') as f:
+            return f.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Prompt file not found: {prompt_path}") from None
 
-    with open(prompt_path, 'r') as f:
-        return f.read()
 
+def _cache_key(pdf_hash, prompt, model):
+    """Build response cache key from PDF content hash, prompt text and model."""
+    prompt_hash = hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    return hashlib.sha256(f"{pdf_hash}:{prompt_hash}:{model}".encode()).hexdigest()
 
-def summarize_paper(pdf_path, model="claude-sonnet-4-5-20250929", prompt_file="v2_no_scratchpad.txt"):
+
+def _url_version(url):
     """
-    Send PDF to Claude API and get summary.
+    Identify the current content behind a PDF URL.
+
+    Versioned arXiv URLs never change, so need no request. Anything else
+    (e.g. an unversioned arXiv URL, which serves the latest revision) is
+    identified by the ETag or Last-Modified from a HEAD request.
+
+    Returns:
+        Version string ('' for immutable URLs), or None if unknown
+    """
+    import httpx
+
+    if _ARXIV_VERSIONED_RE.search(url):
+        return ''
+    try:
+        response = _http_client().head(url)
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return None
+    return response.headers.get('ETag') or response.headers.get('Last-Modified')
+
+
+def _pdf_cache_key(pdf_path, prompt, model):
+    """
+    Compute the response cache key for a PDF file or URL.
+
+    Returns:
+        Cache key, or None if a URL's content can't be identified (in which
+        case the response cache is not used)
+    """
+    if not is_url(pdf_path):
+        return _cache_key(_hash_file(pdf_path), prompt, model)
+
+    # Remote PDFs are passed to the API by URL, so the URL and its current
+    # version stand in for content
+    url = str(pdf_path)
+    version = _url_version(url)
+    if version is None:
+        print(f"Can't tell whether {url} has changed, not using the response cache")
+        return None
+    key_data = f"{url}\n{version}" if version else url
+    return _cache_key(hashlib.blake2b(key_data.encode('utf-8'), digest_size=16).hexdigest(), prompt, model)
+
+
+def _cache_lookup(key):
+    """
+    Look up a previously cached API response.
+
+    Args:
+        key: Cache key from _cache_key()
+
+    Returns:
+        Tuple of (text, usage) or None if not cached. The usage is the one
+        recorded when the response was generated, marked cached=True.
+    """
+    try:
+        text = (RESPONSE_CACHE_DIR / f"{key}.md").read_text(encoding='utf-8')
+        with open(RESPONSE_CACHE_DIR / f"{key}.json", 'r') as f:
+            usage = json.load(f)
+    except FileNotFoundError:
+        return None
+
+    return text, SimpleNamespace(**usage, cached=True)
+
+
+def _atomic_write(path, data):
+    """Write text to path via a temporary file so readers never see partial output."""
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_path.write_text(data, encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def _load_index(path):
+    """Load a JSON index file from the cache directory (empty if missing)."""
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+# Serializes index updates from download threads (see cli._resolve_all)
+_INDEX_LOCK = threading.Lock()
+
+
+def _update_index(path, key, value):
+    """Set one entry in a JSON index file."""
+    with _INDEX_LOCK:
+        # Re-read before writing in case another process updated it meanwhile
+        index = _load_index(path)
+        index[key] = value
+        path.parent.mkdir(parents=True, exist_ok=True)
+        _atomic_write(path, json.dumps(index, indent=2))
+
+
+def _drop_index_entry(path, key):
+    """Remove one entry from a JSON index file, if present."""
+    with _INDEX_LOCK:
+        index = _load_index(path)
+        if index.pop(key, None) is not None:
+            _atomic_write(path, json.dumps(index, indent=2))
+
+
+def _cache_store(key, text, usage):
+    """Store API response text and token usage in the response cache."""
+    RESPONSE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    usage_data = {
+        'input_tokens': usage.input_tokens,
+        'output_tokens': usage.output_tokens,
+        'cache_creation_input_tokens': getattr(usage, 'cache_creation_input_tokens', 0) or 0,
+        'cache_read_input_tokens': getattr(usage, 'cache_read_input_tokens', 0) or 0,
+    }
+    # Write usage first: lookups key off the .md file, so it must land last
+    _atomic_write(RESPONSE_CACHE_DIR / f"{key}.json", json.dumps(usage_data))
+    _atomic_write(RESPONSE_CACHE_DIR / f"{key}.md", text)
+
+
+def _cache_response(key, message, pdf_path):
+    """
+    Store a complete response in the response cache, if caching is on.
+
+    Output cut off at max_tokens would otherwise be replayed on every later
+    run, so only responses that ended normally are stored.
+
+    Args:
+        key: Cache key, or None when not caching
+        message: API response message
+        pdf_path: Paper the response is for, used in the truncation warning
+    """
+    if message.stop_reason == "max_tokens":
+        print(f"\n\033[33mWarning:\033[0m output for {pdf_path} hit the output token limit and is "
+              f"incomplete; not caching it")
+    if key is not None and message.stop_reason == "end_turn":
+        _cache_store(key, message.content[0].text, message.usage)
+
+
+@lru_cache(maxsize=1)
+def _client():
+    """Shared Anthropic client, so calls reuse one connection pool."""
+    # Imported here so --help and cache hits don't pay the SDK import cost
+    from anthropic import Anthropic
+    return Anthropic(api_key=load_api_key(), max_retries=MAX_RETRIES)
+
+
+@lru_cache(maxsize=1)
+def _async_client():
+    """Shared AsyncAnthropic client for the batch path (one event loop per process)."""
+    from anthropic import AsyncAnthropic
+    return AsyncAnthropic(api_key=load_api_key(), max_retries=MAX_RETRIES)
+
+
+def _api_key_hash(client):
+    """Short hash identifying the client's API key, for scoping cached IDs."""
+    api_key = getattr(client, 'api_key', None) or ''
+    return hashlib.blake2b(api_key.encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _upload_key(client, pdf_path):
+    """files.json key for a PDF, scoped to the client's API key."""
+    # File IDs only exist in the workspace of the API key that uploaded them
+    return f"{_api_key_hash(client)}:{_hash_file(pdf_path)}"
+
+
+def _is_missing_file_error(error):
+    """Whether an API error says a referenced file ID does not exist."""
+    return getattr(error, 'status_code', None) in (400, 404) and 'file' in str(error).lower()
+
+
+def upload_pdf(pdf_path, client=None, refresh=False):
+    """
+    Upload PDF through the Anthropic Files API, reusing earlier uploads.
+
+    Uploaded file IDs are cached in ~/.cache/nutshell/files.json keyed by
+    API key and a BLAKE2b hash of the PDF content, so each distinct PDF is
+    uploaded once per workspace.
 
     Args:
         pdf_path: Path to PDF file
+        client: Anthropic client (created if not given)
+        refresh: Upload again even if a file ID is cached (e.g. after the
+            API reported the cached file missing)
+
+    Returns:
+        File ID string
+    """
+    if client is None:
+        client = _client()
+
+    upload_key = _upload_key(client, pdf_path)
+    if not refresh:
+        file_id = _load_index(FILES_CACHE_PATH).get(upload_key)
+        if file_id is not None:
+            return file_id
+
+    print(f"Uploading PDF: {pdf_path}")
+    # Stream the upload from disk rather than from an in-memory copy
+    with open(pdf_path, 'rb') as f:
+        uploaded = client.beta.files.upload(
+            file=(Path(pdf_path).name, f, "application/pdf")
+        )
+
+    _update_index(FILES_CACHE_PATH, upload_key, uploaded.id)
+
+    return uploaded.id
+
+
+def _send_inline(client, pdf_path):
+    """Whether to send a local PDF inline rather than via the Files API."""
+    # Older SDKs have no Files API, so everything goes inline
+    return os.path.getsize(pdf_path) <= INLINE_SIZE_LIMIT or getattr(client.beta, 'files', None) is None
+
+
+def _document_source(client, pdf_path, refresh_upload=False):
+    """
+    Build the document source for a PDF.
+
+    URLs are handed to the API to fetch directly. Local PDFs up to
+    INLINE_SIZE_LIMIT are sent inline as base64, where an upload round trip
+    would cost more than the encoding overhead; larger ones are uploaded
+    once and referenced by Files API ID.
+
+    Args:
+        client: Anthropic client
+        pdf_path: Path or URL of PDF
+        refresh_upload: Upload again rather than reuse a cached file ID
+
+    Returns:
+        Source dict for a document content block
+    """
+    if is_url(pdf_path):
+        return {"type": "url", "url": str(pdf_path)}
+
+    if _send_inline(client, pdf_path):
+        return {
+            "type": "base64",
+            "media_type": "application/pdf",
+            "data": pdf_to_b64(pdf_path)
+        }
+
+    file_id = upload_pdf(pdf_path, client=client, refresh=refresh_upload)
+    return {"type": "file", "file_id": file_id}
+
+
+async def _document_source_async(client, pdf_path, refresh_upload=False):
+    """Async version of _document_source() for use with AsyncAnthropic."""
+    # URL and inline sources need no network access, so share the sync path
+    if is_url(pdf_path) or _send_inline(client, pdf_path):
+        return _document_source(client, pdf_path)
+
+    upload_key = _upload_key(client, pdf_path)
+    file_id = None if refresh_upload else _load_index(FILES_CACHE_PATH).get(upload_key)
+    if file_id is None:
+        print(f"Uploading PDF: {pdf_path}")
+        with open(pdf_path, 'rb') as f:
+            uploaded = await client.beta.files.upload(
+                file=(Path(pdf_path).name, f, "application/pdf")
+            )
+        file_id = uploaded.id
+        _update_index(FILES_CACHE_PATH, upload_key, file_id)
+
+    return {"type": "file", "file_id": file_id}
+
+
+def _build_messages(source, prompt):
+    """
+    Build the request messages: the PDF document followed by the prompt.
+
+    Both blocks are marked for prompt caching so repeat calls on the same
+    paper reuse the processed PDF.
+    """
+    return [
+        {
+            "role": "user",
+            "content": [
+                {
+                    "type": "document",
+                    "source": source,
+                    "cache_control": {"type": "ephemeral"}
+                },
+                {
+                    "type": "text",
+                    "text": prompt,
+                    "cache_control": {"type": "ephemeral"}
+                }
+            ]
+        }
+    ]
+
+
+def _uses_files(messages):
+    """Whether any document in the messages references an uploaded file."""
+    return any(
+        block.get("source", {}).get("type") == "file"
+        for message in messages
+        for block in message["content"]
+    )
+
+
+def _messages_api(client, request):
+    """Pick the messages API for a request, enabling the Files API beta if needed."""
+    if _uses_files(request["messages"]):
+        request["betas"] = [FILES_API_BETA]
+        return client.beta.messages
+    return client.messages
+
+
+def _create_message(client, **request):
+    """Send a messages request and return the complete message."""
+    return _messages_api(client, request).create(**request)
+
+
+def _stream_message(client, on_text=None, **request):
+    """
+    Send a streaming messages request.
+
+    Args:
+        client: Anthropic client
+        on_text: Optional callback receiving each text chunk as it arrives
+        **request: Arguments for messages.stream()
+
+    Returns:
+        Final message once the stream completes
+    """
+    with _messages_api(client, request).stream(**request) as stream:
+        for text in stream.text_stream:
+            if on_text is not None:
+                on_text(text)
+        return stream.get_final_message()
+
+
+def _send_with_uploads(send, build_messages):
+    """
+    Send a request whose documents may reference cached file IDs.
+
+    Cached IDs go stale when the file is deleted on the server. If the API
+    reports a referenced file missing, the PDFs are uploaded again and the
+    request is retried once.
+
+    Args:
+        send: Callable sending a messages list and returning the message
+        build_messages: Callable taking refresh_uploads and returning the
+            messages list
+
+    Returns:
+        Message returned by send
+    """
+    messages = build_messages(False)
+    try:
+        return send(messages)
+    except Exception as e:
+        if not (_uses_files(messages) and _is_missing_file_error(e)):
+            raise
+    print("Uploaded PDF is no longer available, uploading again")
+    return send(build_messages(True))
+
+
+async def _send_with_uploads_async(send, build_messages):
+    """Async version of _send_with_uploads(); both callables are coroutines."""
+    messages = await build_messages(False)
+    try:
+        return await send(messages)
+    except Exception as e:
+        if not (_uses_files(messages) and _is_missing_file_error(e)):
+            raise
+    print("Uploaded PDF is no longer available, uploading again")
+    return await send(await build_messages(True))
+
+
+def _call_claude(pdf_path, model, prompt_file, max_tokens, use_cache=True, refresh=False, on_text=None):
+    """
+    Send PDF and prompt to Claude API, streaming the response.
+
+    Shared implementation of summarize_paper() and transcribe_paper().
+
+    Args:
+        pdf_path: Path to PDF file, or URL of a PDF the API can fetch
         model: Claude model to use
         prompt_file: Prompt file to use from Prompts/ directory
+        max_tokens: Output token limit
+        use_cache: Read and write the local response cache
+        refresh: Ignore any cached response and overwrite it
+        on_text: Optional callback receiving each text chunk (called once
+            with the full text on a cache hit)
 
     Returns:
-        Summary text as string
+        Tuple of (response text, usage)
     """
-    api_key = load_api_key()
-    client = Anthropic(api_key=api_key)
-
-    pdf_data = load_pdf(pdf_path)
-    pdf_base64 = base64.standard_b64encode(pdf_data).decode('utf-8')
     prompt = load_prompt(prompt_file)
 
-    # Use Claude's PDF analysis capability
-    message = client.messages.create(
-        model=model,
-        max_tokens=4096,
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "document",
-                        "source": {
-                            "type": "base64",
-                            "media_type": "application/pdf",
-                            "data": pdf_base64
-                        }
-                    },
-                    {
-                        "type": "text",
-                        "text": prompt
-                    }
-                ]
-            }
-        ]
-    )
+    key = _pdf_cache_key(pdf_path, prompt, model) if use_cache else None
+    if key is not None and not refresh:
+        cached = _cache_lookup(key)
+        if cached is not None:
+            print("Using cached response")
+            if on_text is not None:
+                on_text(cached[0])
+            return cached
+
+    client = _client()
+
+    def build_messages(refresh_uploads):
+        return _build_messages(_document_source(client, pdf_path, refresh_uploads), prompt)
 
+    def send(messages):
+        # Use Claude's PDF analysis capability
+        return _stream_message(client, on_text, model=model, max_tokens=_max_tokens_for(model, max_tokens), messages=messages)
+
+    message = _send_with_uploads(send, build_messages)
+
+    _cache_response(key, message, pdf_path)
     return message.content[0].text, message.usage
 
 
-def transcribe_paper(pdf_path, model="claude-haiku-4-5-20251001", prompt_file="transcribe_v1.txt"):
+def summarize_paper(pdf_path, model="claude-sonnet-4-5-20250929", prompt_file="v2_no_scratchpad.txt",
+                    use_cache=True, refresh=False, on_text=None):
+    """
+    Send PDF to Claude API and get summary.
+
+    See _call_claude() for the remaining arguments.
+
+    Returns:
+        Tuple of (summary text, usage)
+    """
+    return _call_claude(pdf_path, model, prompt_file, SUMMARY_MAX_TOKENS,
+                        use_cache=use_cache, refresh=refresh, on_text=on_text)
+
+
+def transcribe_paper(pdf_path, model="claude-haiku-4-5-20251001", prompt_file="transcribe_v1.txt",
+                     use_cache=True, refresh=False, on_text=None):
     """
     Send PDF to Claude API and get full transcription.
 
+    See _call_claude() for the remaining arguments.
+
+    Returns:
+        Tuple of (transcription text, usage)
+    """
+    return _call_claude(pdf_path, model, prompt_file, TRANSCRIPTION_MAX_TOKENS,
+                        use_cache=use_cache, refresh=refresh, on_text=on_text)
+
+
+class RateLimiter:
+    """
+    Proactive limiter for requests and input tokens per minute.
+
+    Both budgets refill continuously (leaky bucket), and acquire() waits
+    until there is room, so a batch stays under the account's limits
+    instead of running into 429s and backing off. Create it inside the
+    event loop that will use it.
+    """
+
+    def __init__(self, requests_per_minute=None, input_tokens_per_minute=None):
+        import asyncio
+
+        self.requests_per_minute = requests_per_minute
+        self.input_tokens_per_minute = input_tokens_per_minute
+        self.available_request_capacity = requests_per_minute or 0
+        self.available_token_capacity = input_tokens_per_minute or 0
+        self._last_update = time.monotonic()
+        self._lock = asyncio.Lock()
+        self._sleep = asyncio.sleep
+
+    def _refill(self):
+        """Add the capacity accrued since the last update."""
+        now = time.monotonic()
+        minutes = (now - self._last_update) / 60
+        self._last_update = now
+
+        if self.requests_per_minute:
+            self.available_request_capacity = min(
+                self.requests_per_minute,
+                self.available_request_capacity + self.requests_per_minute * minutes
+            )
+        if self.input_tokens_per_minute:
+            self.available_token_capacity = min(
+                self.input_tokens_per_minute,
+                self.available_token_capacity + self.input_tokens_per_minute * minutes
+            )
+
+    def _seconds_until_available(self, tokens, requests):
+        """Time until both budgets cover the request (0 if they already do)."""
+        wait = 0.0
+        if self.requests_per_minute:
+            shortfall = requests - self.available_request_capacity
+            wait = max(wait, shortfall * 60 / self.requests_per_minute)
+        if self.input_tokens_per_minute:
+            shortfall = tokens - self.available_token_capacity
+            wait = max(wait, shortfall * 60 / self.input_tokens_per_minute)
+        return wait
+
+    async def acquire(self, tokens, requests=1):
+        """
+        Wait until the request fits in both budgets, then consume it.
+
+        Args:
+            tokens: Estimated input tokens for the request
+            requests: Number of requests
+        """
+        # A request larger than the whole budget would otherwise wait forever
+        if self.input_tokens_per_minute:
+            tokens = min(tokens, self.input_tokens_per_minute)
+
+        async with self._lock:
+            self._refill()
+            wait = self._seconds_until_available(tokens, requests)
+            while wait > 0:
+                await self._sleep(wait)
+                self._refill()
+                wait = self._seconds_until_available(tokens, requests)
+
+            if self.requests_per_minute:
+                self.available_request_capacity -= requests
+            if self.input_tokens_per_minute:
+                self.available_token_capacity -= tokens
+
+
+# PDFs are billed per page: the page's text plus an image of it, roughly
+# 1,500-3,000 text tokens and ~1,600 image tokens. Err on the high side.
+PDF_TOKENS_PER_PAGE = 3000
+# Page count guesses when the page tree can't be read: URLs (not downloaded)
+# and PDFs whose page objects are inside compressed object streams
+URL_PAGE_GUESS = 20
+BYTES_PER_PAGE_GUESS = 100 * 1024
+
+_PDF_PAGE_RE = re.compile(rb'/Type\s*/Page(?![a-zA-Z])')
+
+
+def _count_pdf_pages(pdf_path):
+    """Count page objects in a PDF, or return None if none are visible."""
+    with open(pdf_path, 'rb') as f:
+        # mmap refuses zero-length files
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        # Scan the mapped file rather than reading it in, so large scans stay cheap
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return sum(1 for _ in _PDF_PAGE_RE.finditer(mm)) or None
+
+
+def _estimate_input_tokens(pdf_path, prompt):
+    """
+    Rough input token estimate for rate limiting.
+
+    Based on the page count rather than file size, since a PDF's size says
+    little about its token cost (a scanned page can be megabytes).
+    """
+    if is_url(pdf_path):
+        pages = URL_PAGE_GUESS
+    else:
+        pages = _count_pdf_pages(pdf_path) or max(1, os.path.getsize(pdf_path) // BYTES_PER_PAGE_GUESS)
+    return pages * PDF_TOKENS_PER_PAGE + len(prompt) // 4
+
+
+async def summarize_paper_async(pdf_path, prompt, model="claude-sonnet-4-5-20250929",
+                                use_cache=True, refresh=False, rate_limiter=None):
+    """
+    Async version of summarize_paper() for concurrent batch runs.
+
     Args:
-        pdf_path: Path to PDF file
+        pdf_path: Path to PDF file, or URL of a PDF the API can fetch
+        prompt: Prompt text (loaded once by the caller)
+        model: Claude model to use
+        use_cache: Read and write the local response cache
+        refresh: Ignore any cached response and overwrite it
+        rate_limiter: Optional RateLimiter to wait on before calling the API
+
+    Returns:
+        Tuple of (summary text, usage)
+    """
+    import asyncio
+
+    loop = asyncio.get_running_loop()
+    key = None
+    if use_cache:
+        # Keying hashes the file or sends a HEAD request for URLs; keep both
+        # off the event loop so other papers keep going meanwhile
+        key = await loop.run_in_executor(None, _pdf_cache_key, pdf_path, prompt, model)
+    if key is not None and not refresh:
+        cached = _cache_lookup(key)
+        if cached is not None:
+            print(f"Using cached response for: {pdf_path}")
+            return cached
+
+    if rate_limiter is not None:
+        # Counting pages scans the file; keep it off the event loop too
+        # (run_in_executor rather than asyncio.to_thread, which needs Python 3.9)
+        tokens = await loop.run_in_executor(None, _estimate_input_tokens, pdf_path, prompt)
+        await rate_limiter.acquire(tokens)
+
+    client = _async_client()
+
+    async def build_messages(refresh_uploads):
+        return _build_messages(await _document_source_async(client, pdf_path, refresh_uploads), prompt)
+
+    async def send(messages):
+        return await _create_message(client, model=model, max_tokens=SUMMARY_MAX_TOKENS, messages=messages)
+
+    message = await _send_with_uploads_async(send, build_messages)
+
+    _cache_response(key, message, pdf_path)
+    return message.content[0].text, message.usage
+
+
+async def summarize_many(pdf_paths, model="claude-sonnet-4-5-20250929", prompt_file="v2_no_scratchpad.txt",
+                         concurrency=DEFAULT_CONCURRENCY, use_cache=True, refresh=False, on_result=None,
+                         requests_per_minute=None, input_tokens_per_minute=None):
+    """
+    Summarize PDFs concurrently on the shared async client.
+
+    The prompt is loaded once for all papers, and an asyncio.Semaphore
+    bounds the number of requests in flight. Given per-minute limits, a
+    RateLimiter also paces requests to stay under them.
+
+    Args:
+        pdf_paths: Paths to PDF files, or URLs of PDFs the API can fetch
         model: Claude model to use
         prompt_file: Prompt file to use from Prompts/ directory
+        concurrency: Maximum number of papers processed at once
+        use_cache: Read and write the local response cache
+        refresh: Ignore any cached responses and overwrite them
+        on_result: Optional callback called with (index, result) as each
+            paper finishes
+        requests_per_minute: Optional request rate limit
+        input_tokens_per_minute: Optional input token rate limit
 
     Returns:
-        Transcription text as string
+        List with a (summary text, usage) tuple, or the exception raised,
+        for each paper
     """
-    api_key = load_api_key()
-    client = Anthropic(api_key=api_key)
+    import asyncio
+
+    # Semaphore(0) would wait forever
+    if concurrency < 1:
+        raise ValueError(f"concurrency must be at least 1, got {concurrency}")
 
-    pdf_data = load_pdf(pdf_path)
-    pdf_base64 = base64.standard_b64encode(pdf_data).decode('utf-8')
     prompt = load_prompt(prompt_file)
+    sem = asyncio.Semaphore(concurrency)
+    rate_limiter = None
+    if requests_per_minute or input_tokens_per_minute:
+        rate_limiter = RateLimiter(requests_per_minute, input_tokens_per_minute)
 
-    # Use Claude's PDF analysis capability with higher token limit for transcriptions
-    message = client.messages.create(
-        model=model,
-        max_tokens=16384,
-        messages=[
-            {
-                "role": "user",
-                "content": [
-                    {
-                        "type": "document",
-                        "source": {
-                            "type": "base64",
-                            "media_type": "application/pdf",
-                            "data": pdf_base64
-                        }
-                    },
-                    {
-                        "type": "text",
-                        "text": prompt
-                    }
-                ]
-            }
-        ]
-    )
+    async def _one(index, pdf_path):
+        async with sem:
+            try:
+                result = await summarize_paper_async(
+                    pdf_path, prompt, model=model, use_cache=use_cache, refresh=refresh,
+                    rate_limiter=rate_limiter
+                )
+            except Exception as e:
+                result = e
+        if on_result is not None:
+            on_result(index, result)
+        return result
 
-    return message.content[0].text, message.usage
+    return await asyncio.gather(*[_one(index, pdf_path) for index, pdf_path in enumerate(pdf_paths)])
 
 
-def calculate_cost(model, input_tokens, output_tokens):
+def summarize_papers(pdf_paths, model="claude-sonnet-4-5-20250929", prompt_file="v2_no_scratchpad.txt",
+                     on_text=None):
     """
-    Calculate cost based on model pricing.
+    Summarize several PDFs in a single API request.
+
+    All papers go in one message as numbered documents, and the model is
+    asked to wrap each summary in <paper id="N"> tags. One request replaces
+    N round trips, but every summary must fit in one response, so this suits
+    small sets of papers. Results are not stored in the response cache.
 
-    Pricing per million tokens (as of 2025):
-    Haiku 3.5: $0.80 input, $4.00 output
-    Sonnet 4.5: $3.00 input, $15.00 output
+    Args:
+        pdf_paths: Paths to PDF files, or URLs of PDFs the API can fetch
+        model: Claude model to use
+        prompt_file: Prompt file to use from Prompts/ directory
+        on_text: Optional callback receiving each text chunk as it arrives
+
+    Returns:
+        Tuple of (list of summary text per paper, None where missing, usage)
     """
-    pricing = {
-        'claude-3-5-haiku-20241022': (0.80, 4.00),
-        'claude-sonnet-4-5-20250929': (3.00, 15.00),
+    prompt = load_prompt(prompt_file)
+    client = _client()
+
+    def build_messages(refresh_uploads):
+        content = []
+        for number, pdf_path in enumerate(pdf_paths, 1):
+            content.append({
+                "type": "document",
+                "source": _document_source(client, pdf_path, refresh_uploads),
+                "title": f"Paper {number}"
+            })
+        content.append({
+            "type": "text",
+            "text": prompt + COMBINED_INSTRUCTIONS.format(count=len(pdf_paths))
+        })
+        return [{"role": "user", "content": content}]
+
+    def send(messages):
+        return _stream_message(
+            client, on_text,
+            model=model,
+            max_tokens=_max_tokens_for(model, min(SUMMARY_MAX_TOKENS * len(pdf_paths), COMBINED_MAX_TOKENS)),
+            messages=messages
+        )
+
+    message = _send_with_uploads(send, build_messages)
+
+    summaries = {
+        int(number): text
+        for number, text in _PAPER_TAG_RE.findall(message.content[0].text)
     }
+    return [summaries.get(number) for number in range(1, len(pdf_paths) + 1)], message.usage
+
+
+def _pending_batches_dir(client):
+    """Directory of submitted, uncollected batches for the client's API key."""
+    # Batches, like uploaded files, are only visible to their own workspace
+    return BATCHES_DIR / _api_key_hash(client)
+
+
+def _collect_batch(client, batch_id, entries, poll_interval):
+    """
+    Wait for a submitted batch to end, then cache its results.
+
+    The batch's pending record is removed once its results are read.
+
+    Args:
+        client: Anthropic client
+        batch_id: ID of the submitted batch
+        entries: Dict of custom_id -> {"pdf": ..., "key": ...} as persisted on submit
+        poll_interval: Seconds between batch status checks
+
+    Returns:
+        Dict of custom_id -> (summary text, usage) for succeeded requests
+    """
+    batch = client.messages.batches.retrieve(batch_id)
+    while batch.processing_status != "ended":
+        time.sleep(poll_interval)
+        batch = client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        print(f"Batch {batch_id}: {counts.processing} processing, "
+              f"{counts.succeeded} succeeded, {counts.errored} errored")
+
+    results = {}
+    for entry in client.messages.batches.results(batch_id):
+        pdf = entries[entry.custom_id]["pdf"]
+        if entry.result.type != "succeeded":
+            print(f"\033[31m✗ Batch request failed for {pdf}:\033[0m {entry.result.type}")
+            # A stale cached file ID fails every time; forget it so the next run uploads again
+            error = getattr(entry.result, 'error', None)
+            if not is_url(pdf) and 'file' in str(error).lower():
+                _drop_index_entry(FILES_CACHE_PATH, _upload_key(client, Path(pdf)))
+                print("  The uploaded PDF was missing; it will be uploaded again on the next run")
+            continue
+
+        message = entry.result.message
+        _cache_response(entries[entry.custom_id]["key"], message, pdf)
+        results[entry.custom_id] = (message.content[0].text, message.usage)
+
+    (_pending_batches_dir(client) / f"{batch_id}.json").unlink(missing_ok=True)
+    return results
+
+
+def _find_pending(client, keys):
+    """
+    Find earlier batches, submitted but never collected, covering some of keys.
 
-    if model not in pricing:
+    Args:
+        client: Anthropic client
+        keys: Response cache keys still needed
+
+    Returns:
+        Dict of batch ID -> persisted entries, for batches with a matching key
+    """
+    pending = {}
+    for path in sorted(_pending_batches_dir(client).glob("*.json")):
+        entries = _load_index(path)
+        if not any(entry["key"] in keys for entry in entries.values()):
+            continue
+        try:
+            client.messages.batches.retrieve(path.stem)
+        except Exception as e:
+            # Batch results are deleted after 29 days
+            if getattr(e, 'status_code', None) != 404:
+                raise
+            print(f"Batch {path.stem} no longer exists, forgetting it")
+            path.unlink(missing_ok=True)
+            continue
+        pending[path.stem] = entries
+    return pending
+
+
+def summarize_papers_batch(pdf_paths, model="claude-sonnet-4-5-20250929", prompt_file="v2_no_scratchpad.txt",
+                           use_cache=True, refresh=False, poll_interval=BATCH_POLL_INTERVAL):
+    """
+    Summarize PDFs through the Message Batches API.
+
+    Batches are billed at half the normal rate but may take up to 24 hours,
+    so this suits offline runs. Blocks, polling every poll_interval seconds,
+    until the batch has ended. Cached papers are not resubmitted.
+
+    Each submitted batch is recorded under BATCHES_DIR until its results are
+    collected, so an interrupted run can be resumed: running it again waits
+    for the earlier batch instead of paying for a new one. This relies on
+    the response cache, so it does not apply with use_cache=False.
+
+    Args:
+        pdf_paths: Paths to PDF files, or URLs of PDFs the API can fetch
+        model: Claude model to use
+        prompt_file: Prompt file to use from Prompts/ directory
+        use_cache: Read and write the local response cache
+        refresh: Ignore any cached responses and overwrite them
+        poll_interval: Seconds between batch status checks
+
+    Returns:
+        List of (summary text, usage) tuples per paper, None where failed
+    """
+    prompt = load_prompt(prompt_file)
+    client = _client()
+
+    results = [None] * len(pdf_paths)
+    keys = [None] * len(pdf_paths)
+    for index, pdf_path in enumerate(pdf_paths):
+        keys[index] = _pdf_cache_key(pdf_path, prompt, model) if use_cache else None
+        if keys[index] is not None and not refresh:
+            results[index] = _cache_lookup(keys[index])
+            if results[index] is not None:
+                print(f"Using cached response for: {pdf_path}")
+
+    # Pick up batches from earlier runs that were interrupted before collecting
+    needed = {keys[index] for index in range(len(pdf_paths)) if results[index] is None} - {None}
+    pending = _find_pending(client, needed) if needed else {}
+    resumed = {entry["key"] for entries in pending.values() for entry in entries.values()}
+    for batch_id in pending:
+        print(f"Resuming batch {batch_id} from an earlier run")
+
+    new_batch_id = None
+    entries = {}
+    requests = []
+    for index, pdf_path in enumerate(pdf_paths):
+        if results[index] is not None or (keys[index] is not None and keys[index] in resumed):
+            continue
+
+        source = _document_source(client, pdf_path)
+        entries[str(index)] = {"pdf": str(pdf_path), "key": keys[index]}
+        requests.append({
+            "custom_id": str(index),
+            "params": {
+                "model": model,
+                "max_tokens": SUMMARY_MAX_TOKENS,
+                "messages": _build_messages(source, prompt)
+            }
+        })
+
+    if requests:
+        if any(_uses_files(request["params"]["messages"]) for request in requests):
+            batch = client.beta.messages.batches.create(requests=requests, betas=[FILES_API_BETA])
+        else:
+            batch = client.messages.batches.create(requests=requests)
+        batches_dir = _pending_batches_dir(client)
+        batches_dir.mkdir(parents=True, exist_ok=True)
+        _atomic_write(batches_dir / f"{batch.id}.json", json.dumps(entries, indent=2))
+        print(f"Submitted batch {batch.id} ({len(requests)} papers)")
+        print("If interrupted, run the same command again to collect the results")
+        pending[batch.id] = entries
+        new_batch_id = batch.id
+
+    # Results are matched back to papers by cache key (resumed batches) or custom_id
+    by_key = {}
+    for batch_id, batch_entries in pending.items():
+        collected = _collect_batch(client, batch_id, batch_entries, poll_interval)
+        if batch_id == new_batch_id:
+            for custom_id, result in collected.items():
+                results[int(custom_id)] = result
+        else:
+            by_key.update((batch_entries[custom_id]["key"], result) for custom_id, result in collected.items())
+
+    for index, key in enumerate(keys):
+        if results[index] is None and key is not None and key in by_key:
+            results[index] = by_key[key]
+
+    return results
+
+
+# (input, output) price per token, as of 2025:
+# Haiku 3.5: $0.80 / $4.00 per million tokens
+# Sonnet 4.5: $3.00 / $15.00 per million tokens
+_PRICING_PER_TOKEN = {
+    'claude-3-5-haiku-20241022': (0.80e-6, 4.00e-6),
+    'claude-sonnet-4-5-20250929': (3.00e-6, 15.00e-6),
+}
+
+
+def calculate_cost(model, input_tokens, output_tokens, cache_creation_tokens=0, cache_read_tokens=0,
+                   batch=False):
+    """
+    Calculate cost based on model pricing.
+
+    Prompt cache writes are billed at 1.25x the input price and cache
+    reads at 0.1x. Cached tokens are not included in input_tokens.
+    Message Batches API requests (batch=True) cost half.
+
+    Returns:
+        Cost in dollars, or None if the model's pricing is unknown
+    """
+    prices = _PRICING_PER_TOKEN.get(model)
+    if prices is None:
         return None
 
-    input_price, output_price = pricing[model]
-    input_cost = (input_tokens / 1_000_000) * input_price
-    output_cost = (output_tokens / 1_000_000) * output_price
+    input_price, output_price = prices
+    billed_input = input_tokens + cache_creation_tokens * 1.25 + cache_read_tokens * 0.10
+    cost = billed_input * input_price + output_tokens * output_price
+    return cost * 0.5 if batch else cost
+
 
-    return input_cost + output_cost
+def _write_text(output_path, *parts, fsync=False):
+    """
+    Write text parts to a UTF-8 file in order, without joining them first.
 
+    Args:
+        output_path: File to write
+        parts: Strings to write
+        fsync: Flush to disk before returning, for durability across crashes
+    """
+    with open(output_path, 'w', encoding='utf-8', newline='') as f:
+        for part in parts:
+            f.write(part)
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
 
-def save_summary(summary_text, output_path):
+
+def save_summary(summary_text, output_path, fsync=False):
     """Save summary to markdown file."""
-    with open(output_path, 'w') as f:
-        f.write(summary_text)
+    _write_text(output_path, summary_text, fsync=fsync)
 
 
-def save_transcription(transcription_text, output_path):
+def save_transcription(transcription_text, output_path, fsync=False):
     """Save transcription to markdown file with disclaimer comment."""
-    disclaimer = "<!-- This is an AI-generated transcript of a PDF. Certain elements of the original document, such as figures and images, have been replaced with descriptions. -->\n\n"
-
-    with open(output_path, 'w') as f:
-        f.write(disclaimer + transcription_text)
+    _write_text(output_path, TRANSCRIPTION_DISCLAIMER, transcription_text, fsync=fsync)
@@ -32,7 +32,11 @@ setup(
     ],
     install_requires=[
         "anthropic>=0.40.0",
+        "httpx",
     ],
+    extras_require={
+        'fast': ["pybase64>=1.0"],
+    },
     entry_points={
         'console_scripts': [
             'nutshell=nutshell_pkg.cli:main',